@@ -0,0 +1,153 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional; fall back to plain Python/NumPy execution
+    def njit(*args, **kwargs):
+        return lambda f: f
+
+
+# -----------------------------
+# Numeric kernels for the dashboard metrics
+# -----------------------------
+
+@njit(cache=True, fastmath=True)
+def wmape_kernel(F, a):
+    # F: (weeks x models) forecasts, a: actuals aligned to the same weeks
+    n_weeks, n_models = F.shape
+    total = 0.0
+    for t in range(n_weeks):
+        total += a[t]
+
+    out = np.zeros(n_models, dtype=F.dtype)
+    if total == 0:
+        return out
+
+    for m in range(n_models):
+        err = 0.0
+        for t in range(n_weeks):
+            err += abs(F[t, m] - a[t])
+        out[m] = err / total
+    return out
+
+
+@njit(cache=True)
+def sharpe_kernel(x):
+    # Mean over sample std of week-over-week percentage changes, with the
+    # variance accumulated by a Welford update
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(1, x.shape[0]):
+        if x[i - 1] == 0:
+            continue
+        r = (x[i] - x[i - 1]) / x[i - 1]
+        n += 1
+        delta = r - mean
+        mean += delta / n
+        m2 += delta * (r - mean)
+
+    if n < 2 or m2 <= 0:
+        return 0.0
+    return mean / np.sqrt(m2 / (n - 1))
+
+
+@njit(cache=True)
+def rolling_std_kernel(x, w):
+    # Sample std over a trailing window of w points, NaN until the window fills
+    n = x.shape[0]
+    out = np.full_like(x, np.nan)
+    for i in range(w - 1, n):
+        mean = 0.0
+        for j in range(i - w + 1, i + 1):
+            mean += x[j]
+        mean /= w
+
+        var = 0.0
+        for j in range(i - w + 1, i + 1):
+            var += (x[j] - mean) ** 2
+        out[i] = np.sqrt(var / (w - 1))
+    return out
+
+
+@njit(cache=True)
+def _ema_kernel(x, alpha, min_periods):
+    # Recursive EMA (pandas ewm with adjust=False); leading NaNs are skipped
+    n = x.shape[0]
+    out = np.full_like(x, np.nan)
+    ema = 0.0
+    count = 0
+    for i in range(n):
+        if np.isnan(x[i]):
+            continue
+        if count == 0:
+            ema = x[i]
+        else:
+            ema += alpha * (x[i] - ema)
+        count += 1
+        if count >= min_periods:
+            out[i] = ema
+    return out
+
+
+@njit(cache=True)
+def rsi_kernel(x, window=14):
+    # Wilder's RSI over week-over-week changes (first change counts as 0)
+    n = x.shape[0]
+    up = np.zeros_like(x)
+    down = np.zeros_like(x)
+    for i in range(1, n):
+        diff = x[i] - x[i - 1]
+        up[i] = diff if diff > 0 else 0.0
+        down[i] = -diff if diff < 0 else 0.0
+
+    ema_up = _ema_kernel(up, 1.0 / window, window)
+    ema_down = _ema_kernel(down, 1.0 / window, window)
+
+    out = np.full_like(x, np.nan)
+    for i in range(n):
+        if np.isnan(ema_down[i]):
+            continue
+        if ema_down[i] == 0:
+            out[i] = 100.0
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + ema_up[i] / ema_down[i])
+    return out
+
+
+@njit(cache=True)
+def macd_kernel(x, window_fast=12, window_slow=26, window_sign=9):
+    # MACD line (fast EMA - slow EMA) and its signal EMA
+    ema_fast = _ema_kernel(x, 2.0 / (window_fast + 1), window_fast)
+    ema_slow = _ema_kernel(x, 2.0 / (window_slow + 1), window_slow)
+    macd = ema_fast - ema_slow
+    signal = _ema_kernel(macd, 2.0 / (window_sign + 1), window_sign)
+    return macd, signal
+
+
+@njit(cache=True)
+def bbands_kernel(x, window=20, window_dev=2):
+    # Upper/lower bands around a simple moving average, population std.
+    # Mean and sum of squared deviations use a rolling Welford update.
+    n = x.shape[0]
+    upper = np.full_like(x, np.nan)
+    lower = np.full_like(x, np.nan)
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        if i < window:
+            delta = x[i] - mean
+            mean += delta / (i + 1)
+            m2 += delta * (x[i] - mean)
+        else:
+            old = x[i - window]
+            old_mean = mean
+            mean += (x[i] - old) / window
+            m2 += (x[i] - old) * (x[i] - mean + old - old_mean)
+        if i >= window - 1:
+            # Rounding can leave m2 a hair below zero on a flat window
+            std = np.sqrt(max(m2, 0.0) / window)
+            upper[i] = mean + window_dev * std
+            lower[i] = mean - window_dev * std
+    return upper, lower
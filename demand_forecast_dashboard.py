@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import plotly.graph_objs as go
 import datetime
-import random
-import ta
+
+from _kernels import (wmape_kernel, sharpe_kernel, rolling_std_kernel,
+                      rsi_kernel, macd_kernel, bbands_kernel)
 
 # -----------------------------
 # 1. Simulate data
@@ -12,8 +14,7 @@ import ta
 
 @st.cache_data
 def simulate_data():
-    np.random.seed(42)
-    random.seed(42)
+    rng = np.random.default_rng(42)
 
     start_date = datetime.date(2021, 4, 1)
     weeks = pd.date_range(start=start_date, periods=156, freq='W')
@@ -22,52 +23,98 @@ def simulate_data():
     items = [f"Item_{i}" for i in range(1, 16)]
     regions = ['North', 'South', 'East', 'West']
 
-    data = []
-    for store in stores:
-        for item in items:
-            region = random.choice(regions)
-            sales = np.random.poisson(lam=random.randint(80, 200), size=len(weeks))
+    n_weeks = len(weeks)
+    n_series = len(stores) * len(items)
+
+    # One entry per (store, item) series, store-major
+    series_store = np.repeat(np.arange(len(stores)), len(items))
+    series_item = np.tile(np.arange(len(items)), len(stores))
+    series_region = rng.integers(0, len(regions), size=n_series)
+    series_lam = rng.integers(80, 201, size=n_series)
+
+    sales = rng.poisson(lam=np.repeat(series_lam, n_weeks))
+    # Exactly 20 promo and 15 event weeks per series, sampled without replacement
+    promo = np.zeros((n_series, n_weeks), dtype=np.int8)
+    event = np.zeros((n_series, n_weeks), dtype=np.int8)
+    np.put_along_axis(promo, np.argsort(rng.random((n_series, n_weeks)), axis=1)[:, :20], 1, axis=1)
+    np.put_along_axis(event, np.argsort(rng.random((n_series, n_weeks)), axis=1)[:, :15], 1, axis=1)
+
+    df_actuals = pd.DataFrame({
+        "Store": pd.Categorical.from_codes(np.repeat(series_store, n_weeks), categories=stores),
+        "Item": pd.Categorical.from_codes(np.repeat(series_item, n_weeks), categories=items),
+        "Region": pd.Categorical.from_codes(np.repeat(series_region, n_weeks), categories=regions),
+        "Week": np.tile(weeks.values, n_series),
+        "Actuals": sales,
+        "Promo": promo.ravel(),
+        "Event": event.ravel()
+    })
 
-            promo_weeks = random.sample(range(len(weeks)), k=20)
-            event_weeks = random.sample(range(len(weeks)), k=15)
+    # Forecasts for next 6 weeks
+    forecast_weeks = pd.date_range(start=weeks[-1] + datetime.timedelta(days=7), periods=6, freq='W')
+    n_forecast = len(forecast_weeks)
+    forecasts = rng.integers(90, 200, size=(n_series * n_forecast, 5))
 
-            for idx, week in enumerate(weeks):
-                data.append({
-                    "Store": store,
-                    "Item": item,
-                    "Region": region,
-                    "Week": week,
-                    "Actuals": sales[idx],
-                    "Promo": 1 if idx in promo_weeks else 0,
-                    "Event": 1 if idx in event_weeks else 0
-                })
+    df_forecasts = pd.DataFrame({
+        "Store": pd.Categorical.from_codes(np.repeat(series_store, n_forecast), categories=stores),
+        "Item": pd.Categorical.from_codes(np.repeat(series_item, n_forecast), categories=items),
+        "Region": pd.Categorical.from_codes(np.repeat(series_region, n_forecast), categories=regions),
+        "Week": np.tile(forecast_weeks.values, n_series),
+        **{f"Model_{model}_Forecast": forecasts[:, model - 1] for model in range(1, 6)}
+    })
 
-    df_actuals = pd.DataFrame(data)
+    # Sort once here so every per-series slice is already in week order
+    sort_keys = ["Store", "Item", "Region", "Week"]
+    df_actuals = df_actuals.sort_values(sort_keys, kind="stable", ignore_index=True)
+    df_forecasts = df_forecasts.sort_values(sort_keys, kind="stable", ignore_index=True)
 
-    # Forecasts for next 6 weeks
-    forecast_weeks = pd.date_range(start=weeks[-1] + datetime.timedelta(days=7), periods=6, freq='W')
-    forecast_data = []
-    for store in stores:
-        for item in items:
-            for week in forecast_weeks:
-                for model in range(1, 6):
-                    forecast_data.append({
-                        "Store": store,
-                        "Item": item,
-                        "Region": random.choice(regions),
-                        "Week": week,
-                        f"Model_{model}_Forecast": np.random.randint(90, 200)
-                    })
+    # Row positions per (Store, Item, Region) so filtering is a lookup, not a scan
+    actuals_index = df_actuals.groupby(["Store", "Item", "Region"], observed=True).indices
+    forecasts_index = df_forecasts.groupby(["Store", "Item", "Region"], observed=True).indices
+
+    # Sidebar choices in order of first appearance, computed once per cache fill
+    filter_options = {column: tuple(df_actuals[column].unique()) for column in ["Store", "Item", "Region"]}
+
+    return df_actuals, df_forecasts, actuals_index, forecasts_index, filter_options
 
-    df_forecasts = pd.DataFrame(forecast_data)
-    df_forecasts = df_forecasts.groupby(["Store", "Item", "Region", "Week"]).sum().reset_index()
+df_actuals, df_forecasts, actuals_index, forecasts_index, filter_options = simulate_data()
 
-    return df_actuals, df_forecasts
+# Indicators are cached on the Actuals array so reruns from unrelated
+# widgets reuse the previous result; entries are bounded to the last few
+# selections
 
-df_actuals, df_forecasts = simulate_data()
+@st.cache_data(max_entries=8)
+def rsi_cached(a, window=14):
+    return rsi_kernel(a, window)
+
+@st.cache_data(max_entries=8)
+def macd_cached(a, window_fast=12, window_slow=26, window_sign=9):
+    return macd_kernel(a, window_fast, window_slow, window_sign)
+
+@st.cache_data(max_entries=8)
+def bbands_cached(a, window=20, window_dev=2):
+    return bbands_kernel(a, window, window_dev)
+
+@st.cache_data(max_entries=8)
+def sharpe_cached(a):
+    return sharpe_kernel(a)
+
+# Figures are cached on the data they plot, so tabs whose inputs did not
+# change skip rebuilding the figure. build_line_fig serves four charts per
+# selection, so it keeps proportionally more entries.
+
+@st.cache_data(max_entries=32)
+def build_line_fig(title, x, traces, mode=None):
+    fig = go.Figure()
+    for name, y in traces.items():
+        fig.add_trace(go.Scattergl(x=x, y=y, mode=mode, name=name))
+    fig.update_layout(title=title, template="plotly_white")
+    return fig
 
-# Save original forecasts for reset
-original_forecasts = df_forecasts.copy()
+@st.cache_data(max_entries=8)
+def build_bar_fig(title, x, y):
+    fig = go.Figure([go.Bar(x=x, y=y)])
+    fig.update_layout(title=title, template="plotly_white")
+    return fig
 
 # -----------------------------
 # 2. UI - Sidebar Filters
@@ -76,24 +123,24 @@ original_forecasts = df_forecasts.copy()
 st.set_page_config(page_title="Demand Forecasting Dashboard", layout="wide")
 
 st.sidebar.title("🔎 Filters")
-store_selected = st.sidebar.selectbox("Select Store", df_actuals['Store'].unique())
-item_selected = st.sidebar.selectbox("Select Item", df_actuals['Item'].unique())
-region_selected = st.sidebar.selectbox("Select Region", df_actuals['Region'].unique())
+store_selected = st.sidebar.selectbox("Select Store", filter_options["Store"])
+item_selected = st.sidebar.selectbox("Select Item", filter_options["Item"])
+region_selected = st.sidebar.selectbox("Select Region", filter_options["Region"])
 moving_avg_weeks = st.sidebar.multiselect("Select Moving Averages", [3,5,10])
 
 # Reset Button
 if st.sidebar.button("🔄 Reset Forecasts"):
-    df_forecasts = original_forecasts.copy()
+    for key in [key for key in st.session_state if key.startswith("forecast_editor")]:
+        del st.session_state[key]
     st.success("Forecasts have been reset!")
 
 # Filter data
-df_hist = df_actuals[(df_actuals['Store'] == store_selected) &
-                     (df_actuals['Item'] == item_selected) &
-                     (df_actuals['Region'] == region_selected)]
-
-df_future = df_forecasts[(df_forecasts['Store'] == store_selected) &
-                         (df_forecasts['Item'] == item_selected) &
-                         (df_forecasts['Region'] == region_selected)]
+selection = (store_selected, item_selected, region_selected)
+df_hist = df_actuals.iloc[actuals_index.get(selection, [])]
+df_future = df_forecasts.iloc[forecasts_index.get(selection, [])]
+actuals = df_hist['Actuals'].to_numpy(dtype=np.float32)
+weeks = df_hist['Week'].to_numpy()
+model_columns = [f"Model_{model}_Forecast" for model in range(1,6)]
 
 # -----------------------------
 # 3. Tabs Layout
@@ -107,7 +154,11 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
     "🚀 Metrics - Sharpe Ratio",
     "🧠 Metrics - Volume Impact",
     "📝 Promo History"
-])
+], key="active_tab", on_change="rerun")
+
+# Only the selected tab's body runs on a rerun. Tab 1's forecast editor is
+# the exception: it always runs because its edits feed the WMAPE
+# comparison in Tab 2.
 
 # -----------------------------
 # 4. Tab 1 - Forecast Adjustment
@@ -118,126 +169,126 @@ with tab1:
 
     # Editable forecasts
     st.subheader("Edit Forecasts:")
-    for model in range(1,6):
-        df_future[f"Model_{model}_Forecast"] = st.number_input(
-            f"Model {model} Forecast for next week",
-            value=int(df_future.iloc[0][f"Model_{model}_Forecast"]),
-            key=f"forecast_model_{model}"
+    # Forecast rows only exist for each series' own region
+    if df_future.empty:
+        st.info("No forecasts for this Store/Item/Region combination.")
+    else:
+        edited = st.data_editor(
+            df_future[['Week'] + model_columns],
+            num_rows="fixed",
+            disabled=['Week'],
+            hide_index=True,
+            column_config={column: st.column_config.NumberColumn(required=True, step=1) for column in model_columns},
+            width="stretch",
+            key=f"forecast_editor_{'_'.join(selection)}"
         )
-
-    # Merge actuals and forecasts
-    df_plot = pd.concat([df_hist[['Week', 'Actuals', 'Promo', 'Event']], 
-                         df_future[['Week'] + [f"Model_{i}_Forecast" for i in range(1,6)]]], axis=0)
-
-    fig = go.Figure()
-
-    fig.add_trace(go.Scatter(x=df_plot['Week'], y=df_plot['Actuals'], mode='lines+markers', name='Actuals'))
-
-    for model in range(1,6):
-        fig.add_trace(go.Scatter(x=df_plot['Week'], y=df_plot.get(f'Model_{model}_Forecast', np.nan),
-                                 mode='lines', name=f'Model {model} Forecast'))
-
-    # Promo and Event bars
-    promo_weeks = df_plot[df_plot['Promo'] == 1]['Week']
-    event_weeks = df_plot[df_plot['Event'] == 1]['Week']
-
-    for week in promo_weeks:
-        fig.add_vrect(x0=week - pd.Timedelta(days=3), x1=week + pd.Timedelta(days=3),
-                      fillcolor="LightGreen", opacity=0.3, line_width=0)
-
-    for week in event_weeks:
-        fig.add_vrect(x0=week - pd.Timedelta(days=3), x1=week + pd.Timedelta(days=3),
-                      fillcolor="LightSkyBlue", opacity=0.3, line_width=0)
-
-    # Moving averages
-    if moving_avg_weeks:
-        for window in moving_avg_weeks:
-            df_plot[f"MA_{window}"] = df_plot['Actuals'].rolling(window=window).mean()
-            fig.add_trace(go.Scatter(x=df_plot['Week'], y=df_plot[f"MA_{window}"],
-                                     mode='lines', name=f'{window}-Week MA', line=dict(dash='dash')))
-
-    fig.update_layout(title="Demand Forecast vs Actuals",
-                      xaxis_title="Week",
-                      yaxis_title="Units",
-                      height=600,
-                      template="plotly_white")
-    
-    st.plotly_chart(fig, use_container_width=True)
+        df_future.loc[:, model_columns] = edited[model_columns].to_numpy()
+
+    # The chart only needs building while Tab 1 is visible
+    if tab1.open:
+        # Merge actuals and forecasts
+        plot_columns = ['Week', 'Actuals', 'Promo', 'Event'] + model_columns
+        df_plot = pd.concat([df_hist.reindex(columns=plot_columns),
+                             df_future.reindex(columns=plot_columns)], axis=0, ignore_index=True)
+
+        fig = go.Figure()
+
+        fig.add_trace(go.Scattergl(x=df_plot['Week'], y=df_plot['Actuals'], mode='lines+markers', name='Actuals'))
+
+        for model in range(1,6):
+            fig.add_trace(go.Scattergl(x=df_plot['Week'], y=df_plot[f'Model_{model}_Forecast'],
+                                       mode='lines', name=f'Model {model} Forecast'))
+
+        # Promo and Event bars
+        promo_weeks = df_plot[df_plot['Promo'] == 1]['Week']
+        event_weeks = df_plot[df_plot['Event'] == 1]['Week']
+
+        shapes = [dict(type="rect", xref="x", yref="paper", y0=0, y1=1,
+                       x0=week - pd.Timedelta(days=3), x1=week + pd.Timedelta(days=3),
+                       fillcolor=color, opacity=0.3, line_width=0)
+                  for highlight_weeks, color in ((promo_weeks, "LightGreen"), (event_weeks, "LightSkyBlue"))
+                  for week in highlight_weeks]
+        fig.update_layout(shapes=shapes)
+
+        # Moving averages
+        if moving_avg_weeks:
+            plot_actuals = df_plot['Actuals'].to_numpy(dtype=np.float32)
+            for window in moving_avg_weeks:
+                moving_avg = np.full_like(plot_actuals, np.nan)
+                if len(plot_actuals) >= window:
+                    moving_avg[window - 1:] = sliding_window_view(plot_actuals, window).mean(axis=1)
+                fig.add_trace(go.Scattergl(x=df_plot['Week'], y=moving_avg,
+                                           mode='lines', name=f'{window}-Week MA', line=dict(dash='dash')))
+
+        fig.update_layout(title="Demand Forecast vs Actuals",
+                          xaxis_title="Week",
+                          yaxis_title="Units",
+                          height=600,
+                          template="plotly_white")
+
+        st.plotly_chart(fig, width="stretch")
 
 # -----------------------------
 # 5. Tab 2 - WMAPE Comparison
 # -----------------------------
 
-with tab2:
-    st.title("📊 WMAPE Across Models")
+if tab2.open:
+    with tab2:
+        st.title("📊 WMAPE Across Models")
 
-    wmape_scores = {}
-    for model in range(1,6):
-        pred = df_future[f"Model_{model}_Forecast"].values
-        actual = df_hist['Actuals'].values[-len(pred):]
-        wmape = np.sum(np.abs(actual - pred)) / np.sum(actual) if np.sum(actual) != 0 else 0
-        wmape_scores[f'Model {model}'] = wmape
+        # Score all models in one pass over a (weeks x models) matrix
+        pred = df_future[model_columns].to_numpy(dtype=np.float32)
+        wmape = wmape_kernel(pred, actuals[-len(pred):])
 
-    fig_wmape = go.Figure([go.Bar(x=list(wmape_scores.keys()), y=list(wmape_scores.values()))])
-    fig_wmape.update_layout(title="WMAPE by Model", template="plotly_white")
+        fig_wmape = build_bar_fig("WMAPE by Model", [f'Model {model}' for model in range(1,6)], wmape)
 
-    st.plotly_chart(fig_wmape, use_container_width=True)
+        st.plotly_chart(fig_wmape, width="stretch")
 
 # -----------------------------
 # 6. Tab 3-7: Advanced Metrics
 # -----------------------------
 
-with tab3:
-    st.title("📉 RSI and MACD")
-    df_metrics = df_hist.copy()
-    df_metrics['RSI'] = ta.momentum.RSIIndicator(df_metrics['Actuals']).rsi()
-    macd = ta.trend.MACD(df_metrics['Actuals'])
-    df_metrics['MACD'] = macd.macd()
-    df_metrics['MACD_Signal'] = macd.macd_signal()
-
-    fig_rsi = go.Figure()
-    fig_rsi.add_trace(go.Scatter(x=df_metrics['Week'], y=df_metrics['RSI'], mode='lines', name='RSI'))
-    fig_rsi.update_layout(title="RSI", template="plotly_white")
-    st.plotly_chart(fig_rsi, use_container_width=True)
-
-    fig_macd = go.Figure()
-    fig_macd.add_trace(go.Scatter(x=df_metrics['Week'], y=df_metrics['MACD'], name="MACD"))
-    fig_macd.add_trace(go.Scatter(x=df_metrics['Week'], y=df_metrics['MACD_Signal'], name="Signal"))
-    fig_macd.update_layout(title="MACD", template="plotly_white")
-    st.plotly_chart(fig_macd, use_container_width=True)
-
-with tab4:
-    st.title("🎯 Std Dev and Bollinger Bands")
-    df_metrics['StdDev'] = df_metrics['Actuals'].rolling(window=10).std()
-    boll = ta.volatility.BollingerBands(df_metrics['Actuals'])
-    df_metrics['Boll_Upper'] = boll.bollinger_hband()
-    df_metrics['Boll_Lower'] = boll.bollinger_lband()
-
-    fig_std = go.Figure()
-    fig_std.add_trace(go.Scatter(x=df_metrics['Week'], y=df_metrics['StdDev'], mode='lines', name='Std Dev'))
-    fig_std.update_layout(title="Standard Deviation", template="plotly_white")
-    st.plotly_chart(fig_std, use_container_width=True)
-
-    fig_boll = go.Figure()
-    fig_boll.add_trace(go.Scatter(x=df_metrics['Week'], y=df_metrics['Actuals'], name="Actuals"))
-    fig_boll.add_trace(go.Scatter(x=df_metrics['Week'], y=df_metrics['Boll_Upper'], name="Upper Band"))
-    fig_boll.add_trace(go.Scatter(x=df_metrics['Week'], y=df_metrics['Boll_Lower'], name="Lower Band"))
-    fig_boll.update_layout(title="Bollinger Bands", template="plotly_white")
-    st.plotly_chart(fig_boll, use_container_width=True)
-
-with tab5:
-    st.title("🚀 Sharpe Ratio Analysis")
-    returns = df_hist['Actuals'].pct_change()
-    sharpe_ratio = returns.mean() / returns.std() if returns.std() != 0 else 0
-    st.metric("Sharpe Ratio (Demand Growth Stability)", f"{sharpe_ratio:.2f}")
-
-with tab6:
-    st.title("🧠 Volume Impact of Promotions")
-    promo_impact = df_hist[df_hist['Promo'] == 1]['Actuals'].mean() - df_hist[df_hist['Promo'] == 0]['Actuals'].mean()
-    st.metric("Promo Volume Impact", f"{promo_impact:.1f} Units")
-
-with tab7:
-    st.title("📝 Historical Promo/Event Weeks")
-    promo_table = df_hist[(df_hist['Promo'] == 1) | (df_hist['Event'] == 1)][['Week', 'Promo', 'Event', 'Actuals']]
-    st.dataframe(promo_table)
+if tab3.open:
+    with tab3:
+        st.title("📉 RSI and MACD")
+        rsi = rsi_cached(actuals)
+        macd, macd_signal = macd_cached(actuals)
+
+        fig_rsi = build_line_fig("RSI", weeks, {'RSI': rsi}, mode='lines')
+        st.plotly_chart(fig_rsi, width="stretch")
+
+        fig_macd = build_line_fig("MACD", weeks, {"MACD": macd, "Signal": macd_signal})
+        st.plotly_chart(fig_macd, width="stretch")
+
+if tab4.open:
+    with tab4:
+        st.title("🎯 Std Dev and Bollinger Bands")
+        std_dev = rolling_std_kernel(actuals, 10)
+        boll_upper, boll_lower = bbands_cached(actuals)
+
+        fig_std = build_line_fig("Standard Deviation", weeks, {'Std Dev': std_dev}, mode='lines')
+        st.plotly_chart(fig_std, width="stretch")
+
+        fig_boll = build_line_fig("Bollinger Bands", weeks, {"Actuals": actuals,
+                                                             "Upper Band": boll_upper,
+                                                             "Lower Band": boll_lower})
+        st.plotly_chart(fig_boll, width="stretch")
+
+if tab5.open:
+    with tab5:
+        st.title("🚀 Sharpe Ratio Analysis")
+        sharpe_ratio = sharpe_cached(actuals)
+        st.metric("Sharpe Ratio (Demand Growth Stability)", f"{sharpe_ratio:.2f}")
+
+if tab6.open:
+    with tab6:
+        st.title("🧠 Volume Impact of Promotions")
+        promo_impact = df_hist[df_hist['Promo'] == 1]['Actuals'].mean() - df_hist[df_hist['Promo'] == 0]['Actuals'].mean()
+        st.metric("Promo Volume Impact", f"{promo_impact:.1f} Units")
+
+if tab7.open:
+    with tab7:
+        st.title("📝 Historical Promo/Event Weeks")
+        promo_table = df_hist[(df_hist['Promo'] == 1) | (df_hist['Event'] == 1)][['Week', 'Promo', 'Event', 'Actuals']]
+        st.dataframe(promo_table)
 